@@ -0,0 +1,296 @@
+"""
+Shared helpers for the Zobo ESP32 tool scripts
+(build_flash.py, ota_server.py, release.py).
+"""
+
+import os
+import sys
+import json
+import re
+import mmap
+import zlib
+import shutil
+import subprocess
+from functools import lru_cache
+from pathlib import Path
+
+# Paths
+SCRIPT_DIR = Path(__file__).parent.resolve()
+BUILD_DIR = SCRIPT_DIR / "build"
+FIRMWARE_BIN = BUILD_DIR / "zobo_esp32.bin"
+VERSION_JSON = BUILD_DIR / "version.json"
+OTA_MANAGER_H = SCRIPT_DIR / "main" / "ota_manager.h"
+
+_FW_RE = re.compile(rb'#define\s+FIRMWARE_VERSION\s+"([^"]+)"')
+
+# Remembers the last ESP-IDF found so repeated runs skip the discovery walk
+IDF_CACHE = Path.home() / ".zobo_idf_cache.json"
+
+# Environment variables produced by export.bat, reused until it changes
+IDF_ENV_CACHE = Path.home() / ".zobo_idf_env.json"
+
+_idf_env = {}
+
+# ESP-IDF paths whose _idf_env entry came from IDF_ENV_CACHE, not export.bat
+_idf_env_cached = set()
+
+# Firmware is checksummed in chunks of this size for version.json
+CRC_CHUNK_SIZE = 4096
+
+
+def _load_cached_idf():
+    """Return cached ESP-IDF path if it is still valid."""
+    try:
+        cached = json.loads(IDF_CACHE.read_text())
+        path = Path(cached["path"])
+        if (path / "export.bat").stat().st_mtime == cached["mtime"]:
+            return path
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _save_cached_idf(path):
+    """Store discovered ESP-IDF path together with export.bat mtime."""
+    try:
+        mtime = (path / "export.bat").stat().st_mtime
+        IDF_CACHE.write_text(json.dumps({"path": str(path), "mtime": mtime}))
+    except OSError:
+        pass
+
+
+def _scan_dirs(parent, prefix, subdir=""):
+    """List parent's subdirectories named prefix*, joined with subdir."""
+    found = []
+    try:
+        # DirEntry carries the file type, no extra stat per entry
+        with os.scandir(parent) as it:
+            for entry in it:
+                if entry.name.startswith(prefix) and entry.is_dir(follow_symlinks=False):
+                    found.append(Path(entry.path) / subdir)
+    except OSError:
+        pass
+    return found
+
+
+@lru_cache(maxsize=None)
+def find_esp_idf():
+    """Find ESP-IDF installation."""
+    # Explicit environment always wins over the cache
+    env_path = os.environ.get("IDF_PATH")
+    if env_path and (Path(env_path) / "export.bat").exists():
+        return Path(env_path)
+
+    cached = _load_cached_idf()
+    if cached:
+        return cached
+
+    possible_paths = []
+
+    # Check VS Code ESP-IDF extension settings
+    vscode_settings = Path.home() / "AppData/Roaming/Code/User/settings.json"
+    if vscode_settings.exists():
+        try:
+            settings = json.loads(vscode_settings.read_text())
+            if "idf.espIdfPathWin" in settings:
+                possible_paths.append(Path(settings["idf.espIdfPathWin"]))
+        except Exception:
+            pass
+
+    # Common locations
+    possible_paths.extend([
+        Path.home() / "esp" / "v5.2.6" / "esp-idf",
+        Path.home() / "esp" / "esp-idf",
+        Path("C:/Espressif/frameworks/esp-idf-v5.2.6"),
+        Path("C:/Espressif/frameworks/esp-idf-v5.2"),
+        Path("C:/esp/esp-idf"),
+    ])
+
+    # Check ~/esp for version folders and Espressif installer frameworks
+    possible_paths.extend(_scan_dirs(Path.home() / "esp", "v", "esp-idf"))
+    possible_paths.extend(_scan_dirs(Path("C:/Espressif/frameworks"), "esp-idf-v"))
+
+    for path in possible_paths:
+        if path and path.exists() and (path / "export.bat").exists():
+            _save_cached_idf(path)
+            return path
+
+    return None
+
+
+def _env_key(key):
+    """Normalize env variable name (Windows names are case-insensitive)."""
+    return key.upper() if os.name == "nt" else key
+
+
+def _tools_stamp():
+    """mtime of idf-env.json, which idf_tools.py rewrites on install/upgrade."""
+    tools_path = Path(os.environ.get("IDF_TOOLS_PATH") or Path.home() / ".espressif")
+    try:
+        return (tools_path / "idf-env.json").stat().st_mtime
+    except OSError:
+        return None
+
+
+def _capture_export_env(export_bat):
+    """Run export.bat once and return (changed variables, PATH prefix).
+
+    PATH is not stored whole - only the directories export.bat put in
+    front of it, so later changes to the user's PATH still apply.
+    """
+    result = subprocess.run(
+        f'call "{export_bat}" >nul 2>&1 && set',
+        shell=True,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        return None
+
+    path_key = _env_key("PATH")
+    current = {_env_key(k): v for k, v in os.environ.items()}
+    changed = {}
+    for line in result.stdout.splitlines():
+        key, sep, value = line.partition("=")
+        if not sep or not key:
+            continue
+        key = _env_key(key)
+        if current.get(key) != value:
+            changed[key] = value
+
+    old_path = set(current.get(path_key, "").split(os.pathsep))
+    new_path = changed.pop(path_key, "").split(os.pathsep)
+    path_prefix = [p for p in new_path if p and p not in old_path]
+    return changed, path_prefix
+
+
+def _load_cached_env(export_bat, mtime, tools_stamp):
+    """Cached (changed, PATH prefix) if still valid, else None."""
+    try:
+        cached = json.loads(IDF_ENV_CACHE.read_text())
+        if (cached["export_bat"] != str(export_bat) or cached["mtime"] != mtime
+                or cached["tools"] != tools_stamp):
+            return None
+        path_prefix = cached["path_prefix"]
+        # Tool directories replaced by an upgrade - capture again
+        if not all(os.path.isdir(p) for p in path_prefix):
+            return None
+        return cached["env"], path_prefix
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def get_idf_env(idf_path, refresh=False):
+    """Return environment for running idf.py without calling export.bat each time."""
+    idf_path = Path(idf_path)
+    if idf_path in _idf_env and not refresh:
+        return _idf_env[idf_path]
+
+    export_bat = idf_path / "export.bat"
+    try:
+        mtime = export_bat.stat().st_mtime
+    except OSError:
+        return None
+    tools_stamp = _tools_stamp()
+
+    captured = None if refresh else _load_cached_env(export_bat, mtime, tools_stamp)
+    if captured is not None:
+        _idf_env_cached.add(idf_path)
+    else:
+        _idf_env_cached.discard(idf_path)
+        captured = _capture_export_env(export_bat)
+        if captured is None:
+            return None
+        try:
+            IDF_ENV_CACHE.write_text(json.dumps({
+                "export_bat": str(export_bat),
+                "mtime": mtime,
+                "tools": tools_stamp,
+                "env": captured[0],
+                "path_prefix": captured[1],
+            }))
+        except OSError:
+            pass
+
+    changed, path_prefix = captured
+    env = {_env_key(k): v for k, v in os.environ.items()}
+    env.update(changed)
+    path_key = _env_key("PATH")
+    env[path_key] = os.pathsep.join(path_prefix + [env.get(path_key, "")])
+    _idf_env[idf_path] = env
+    return env
+
+
+def _idf_python(env):
+    """Python interpreter on the ESP-IDF PATH, None if there is none."""
+    return shutil.which("python", path=env.get("PATH"))
+
+
+def idf_command(idf_path, env, *args):
+    """Build argv for calling idf.py directly with the IDF Python."""
+    python = _idf_python(env) or sys.executable
+    return [python, str(Path(idf_path) / "tools" / "idf.py"), *args]
+
+
+def run_idf_command(idf_path, *args):
+    """Run idf.py command in ESP-IDF environment."""
+    env = get_idf_env(idf_path)
+    if env is None:
+        print(f"\nERROR: Cannot load ESP-IDF environment from {idf_path}")
+        return False
+
+    # A cached env can outlive a replaced python_env - recapture only
+    # when idf.py couldn't start with it, never after ordinary build or
+    # flash errors (export.bat takes seconds)
+    if Path(idf_path) in _idf_env_cached and _idf_python(env) is None:
+        env = get_idf_env(idf_path, refresh=True)
+        if env is None:
+            print(f"\nERROR: Cannot load ESP-IDF environment from {idf_path}")
+            return False
+
+    try:
+        result = subprocess.run(
+            idf_command(idf_path, env, *args),
+            cwd=str(SCRIPT_DIR),
+            env=env
+        )
+    except OSError as e:
+        print(f"\nERROR: Cannot start idf.py: {e}")
+        return False
+    return result.returncode == 0
+
+
+def build_firmware(idf_path):
+    """Build firmware using ESP-IDF."""
+    print("\n" + "="*60)
+    print("  Building firmware...")
+    print("="*60 + "\n")
+
+    return run_idf_command(idf_path, "build")
+
+
+def chunk_crc32(path, chunk_size=CRC_CHUNK_SIZE):
+    """CRC32 of each chunk_size slice of a file, as hex strings."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                return [
+                    f"0x{zlib.crc32(view[i:i + chunk_size]):08x}"
+                    for i in range(0, len(view), chunk_size)
+                ]
+            finally:
+                view.release()
+
+
+def get_firmware_version(header=OTA_MANAGER_H):
+    """Extract firmware version from ota_manager.h, None if not found."""
+    try:
+        with open(header, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            match = _FW_RE.search(mm)
+            return match.group(1).decode() if match else None
+    except (OSError, ValueError):
+        return None
@@ -7,20 +7,17 @@ Usage:
   python monitor.py           # Use default COM9
   python monitor.py COM5      # Use specific port
   python monitor.py --list    # List available ports
+  python monitor.py --decode  # Decode UTF-8 for non-UTF-8 consoles
 """
 
+import codecs
 import sys
-import time
 
 try:
     import serial
     import serial.tools.list_ports
 except ImportError:
-    print("Installing pyserial...")
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "pyserial"])
-    import serial
-    import serial.tools.list_ports
+    sys.exit("ERROR: pyserial not installed. Run: pip install pyserial")
 
 DEFAULT_PORT = "COM9"
 BAUD_RATE = 115200
@@ -38,7 +35,17 @@ def list_ports():
         print(f"  {port.device}: {port.description}")
     print()
 
-def monitor(port):
+def set_low_latency(ser):
+    """Enable ASYNC_LOW_LATENCY on Linux (skips the 16 ms FTDI latency timer)."""
+    if not hasattr(ser, "set_low_latency_mode"):
+        return
+    try:
+        ser.set_low_latency_mode(True)
+    except (OSError, ValueError):
+        # Not supported by this driver - keep default latency
+        pass
+
+def monitor(port, decode=False):
     """Start serial monitor."""
     print(f"\n{'='*60}")
     print(f"  ESP32 Serial Monitor - {port} @ {BAUD_RATE} baud")
@@ -46,18 +53,30 @@ def monitor(port):
     print("Press Ctrl+C to exit\n")
 
     try:
-        ser = serial.Serial(port, BAUD_RATE, timeout=1)
+        # Blocking read wakes on incoming data; the timeout only bounds
+        # how long Ctrl+C may wait on Windows
+        ser = serial.Serial(port, BAUD_RATE, timeout=0.1)
         ser.flushInput()
+        set_low_latency(ser)
+
+        # Text prints and raw byte writes must reach stdout in order,
+        # and ESP32 line endings are passed through untouched
+        sys.stdout.reconfigure(newline='', write_through=True)
+        out = sys.stdout.buffer
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace') if decode else None
 
         while True:
-            if ser.in_waiting:
-                try:
-                    line = ser.readline().decode('utf-8', errors='replace')
-                    print(line, end='')
-                except:
-                    pass
+            # Grab whole bursts in one read instead of a readline per line
+            chunk = ser.read(ser.in_waiting or 1)
+            if not chunk:
+                continue
+
+            if decoder:
+                # Console encoding is not UTF-8 - let Python re-encode
+                sys.stdout.write(decoder.decode(chunk))
             else:
-                time.sleep(0.01)
+                out.write(chunk)
+                out.flush()
 
     except serial.SerialException as e:
         print(f"\nERROR: Cannot open {port}")
@@ -82,10 +101,13 @@ def main():
         print(__doc__)
         return
 
+    decode = "--decode" in args or "-d" in args
+
     # Get port from args or use default
-    port = args[0] if args else DEFAULT_PORT
+    ports = [a for a in args if not a.startswith("-")]
+    port = ports[0] if ports else DEFAULT_PORT
 
-    monitor(port)
+    monitor(port, decode)
 
 if __name__ == "__main__":
     main()
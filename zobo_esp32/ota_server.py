@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+OTA Server for Zobo ESP32
+Builds firmware and starts HTTP server for OTA updates.
+Run from any terminal - no ESP-IDF environment needed.
+
+Usage:
+  python ota_server.py               # Build and serve on port 8080
+  python ota_server.py --port 8000   # Use different port
+  python ota_server.py --skip-build  # Serve existing build
+"""
+
+import argparse
+import gzip
+import json
+import re
+import shutil
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from _tooling import (
+    BUILD_DIR,
+    CRC_CHUNK_SIZE,
+    FIRMWARE_BIN,
+    VERSION_JSON,
+    build_firmware,
+    chunk_crc32,
+    find_esp_idf,
+    get_firmware_version,
+)
+
+# Configuration
+DEFAULT_PORT = 8080
+FIRMWARE_GZ = BUILD_DIR / "zobo_esp32.bin.gz"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Socket send buffer per connection (bigger TCP window on lossy WiFi)
+SEND_BUFFER_SIZE = 64 * 1024
+
+# Read buffer when compressing the firmware
+GZIP_COPY_BUFFER = 64 * 1024
+
+# Single byte range: "bytes=START-END", "bytes=START-" or "bytes=-SUFFIX"
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+# Cached result of get_local_ip()
+_local_ip = None
+
+
+def accepts_gzip(accept_encoding):
+    """True if an Accept-Encoding header allows gzip (q=0 refuses it)."""
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.strip().split(";")
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding.strip().lower()] = q
+
+    # "*" only covers codings not listed by name
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+class OTARequestHandler(BaseHTTPRequestHandler):
+    """Serves the firmware and version.json from memory.
+
+    The files are loaded once by start_server(), so every device gets
+    the same version.json and binary even if a rebuild starts while the
+    server runs. Supports single HTTP Range requests so a device can
+    resume an interrupted download instead of starting from byte 0, and
+    sends the gzip copy to clients that accept it.
+    """
+
+    # URL path -> (content type, body, gzip-encoded body or None)
+    files = {}
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_SIZE)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        self.send_file(include_body=True)
+
+    def do_HEAD(self):
+        self.send_file(include_body=False)
+
+    def send_file(self, include_body):
+        entry = self.files.get(self.path.split("?", 1)[0])
+        if entry is None:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        content_type, body, gzip_body = entry
+        size = len(body)
+        match = RANGE_RE.fullmatch(self.headers.get("Range", "").strip())
+        first, last = match.groups() if match else ("", "")
+
+        # "bytes=-" and reversed ranges like "bytes=5-3" are invalid, not
+        # unsatisfiable - ignore the header and send the whole file
+        if (first or last) and not (first and last and int(last) < int(first)):
+            if first:
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+            else:
+                # Suffix range "bytes=-N" = last N bytes
+                start = max(size - int(last), 0)
+                end = size - 1
+
+            if start >= size:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.send_header("Accept-Ranges", "bytes")
+                self.end_headers()
+                return
+
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            body = body[start:end + 1]
+        elif gzip_body is not None and accepts_gzip(self.headers.get("Accept-Encoding", "")):
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Encoding", "gzip")
+            body = gzip_body
+        else:
+            self.send_response(HTTPStatus.OK)
+
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        if gzip_body is not None:
+            self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+
+        if include_body:
+            self.wfile.write(body)
+
+
+def _usable_ip(ip):
+    """True for addresses a device on the LAN can reach."""
+    return bool(ip) and not ip.startswith(("127.", "169.254.", "0."))
+
+
+def _interface_ip():
+    """First usable IPv4 address of any interface (needs psutil)."""
+    if psutil is None:
+        return None
+    for addrs in psutil.net_if_addrs().values():
+        for addr in addrs:
+            if addr.family == socket.AF_INET and _usable_ip(addr.address):
+                return addr.address
+    return None
+
+
+def get_local_ip():
+    """Get IP address of the interface used for outgoing traffic."""
+    global _local_ip
+    if _local_ip:
+        return _local_ip
+
+    ip = None
+    try:
+        # UDP connect only does a route lookup, no packet is sent
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("8.8.8.8", 80))
+            ip = s.getsockname()[0]
+    except OSError:
+        pass
+
+    # Offline (no default route) - fall back to interface list / hostname
+    if not _usable_ip(ip):
+        ip = _interface_ip()
+    if not _usable_ip(ip):
+        try:
+            ip = socket.gethostbyname(socket.gethostname())
+        except OSError:
+            ip = None
+
+    _local_ip = ip if _usable_ip(ip) else "localhost"
+    return _local_ip
+
+
+def compress_firmware():
+    """Write gzip copy of the firmware unless an up-to-date one exists."""
+    try:
+        gz_info = FIRMWARE_GZ.stat()
+        if gz_info.st_mtime >= FIRMWARE_BIN.stat().st_mtime:
+            return gz_info
+    except FileNotFoundError:
+        pass
+
+    with open(FIRMWARE_BIN, "rb") as src, \
+            gzip.open(FIRMWARE_GZ, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, GZIP_COPY_BUFFER)
+    return FIRMWARE_GZ.stat()
+
+
+def create_version_json(version, url, info, crc32, gz_info):
+    """Create version.json next to the firmware binary."""
+    version_data = {
+        "version": version,
+        "size": info.st_size,
+        "date": time.strftime(DATE_FORMAT, time.localtime(info.st_mtime)),
+        "url": url,
+        "chunk_size": CRC_CHUNK_SIZE,
+        "crc32": crc32,
+        "gzip_url": f"{url}.gz",
+        "gzip_size": gz_info.st_size
+    }
+
+    # Compact form - this file is downloaded by devices
+    VERSION_JSON.write_text(json.dumps(version_data, separators=(",", ":")))
+
+
+def start_server(port):
+    """Serve firmware files from memory over HTTP until Ctrl+C."""
+    firmware = memoryview(FIRMWARE_BIN.read_bytes())
+    firmware_gz = memoryview(FIRMWARE_GZ.read_bytes())
+    OTARequestHandler.files = {
+        "/zobo_esp32.bin": ("application/octet-stream", firmware, firmware_gz),
+        "/zobo_esp32.bin.gz": ("application/gzip", firmware_gz, None),
+        "/version.json": ("application/json", memoryview(VERSION_JSON.read_bytes()), None),
+    }
+
+    # ThreadingHTTPServer uses daemon threads, so Ctrl+C exits immediately
+    with ThreadingHTTPServer(("", port), OTARequestHandler) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n\nServer stopped.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build firmware and serve it for OTA updates")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="HTTP port (default: 8080)")
+    parser.add_argument("--skip-build", action="store_true", help="Skip firmware build")
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("  Zobo OTA Server")
+    print("="*60)
+
+    # Build firmware
+    if not args.skip_build:
+        idf_path = find_esp_idf()
+        if not idf_path:
+            print("\nERROR: ESP-IDF not found!")
+            print("  Set IDF_PATH environment variable or install ESP-IDF extension in VS Code")
+            sys.exit(1)
+
+        if not build_firmware(idf_path):
+            print("\nERROR: Build failed!")
+            sys.exit(1)
+        print("\nBuild successful!")
+
+    # Check if firmware exists
+    if not FIRMWARE_BIN.exists():
+        print(f"\nERROR: Firmware not found: {FIRMWARE_BIN}")
+        sys.exit(1)
+
+    # Metadata steps are independent - run them side by side
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        ip_future = pool.submit(get_local_ip)
+        version_future = pool.submit(get_firmware_version)
+        crc_future = pool.submit(chunk_crc32, FIRMWARE_BIN)
+        gz_future = pool.submit(compress_firmware)
+
+        info = FIRMWARE_BIN.stat()
+        version = version_future.result() or "unknown"
+
+        print("\n" + "="*60)
+        print("  Firmware Info")
+        print("="*60)
+        print(f"  Version:  {version}")
+        print(f"  Size:     {info.st_size / 1024:.2f} KB")
+        print(f"  Built:    {time.strftime(DATE_FORMAT, time.localtime(info.st_mtime))}")
+
+        base_url = f"http://{ip_future.result()}:{args.port}"
+        create_version_json(version, f"{base_url}/zobo_esp32.bin", info,
+                            crc_future.result(), gz_future.result())
+
+    print("\n" + "="*60)
+    print("  OTA Server Starting")
+    print("="*60)
+    print(f"  URL:      {base_url}/zobo_esp32.bin")
+    print(f"  Version:  {base_url}/version.json")
+    print("\nPress Ctrl+C to stop the server\n")
+
+    start_server(args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,63 +19,25 @@ Usage:
 
 import argparse
 import json
-import os
-import re
 import subprocess
 import sys
+from collections import deque
 from datetime import datetime
-from pathlib import Path
 
-# Paths
-SCRIPT_DIR = Path(__file__).parent
-OTA_MANAGER_H = SCRIPT_DIR / "main" / "ota_manager.h"
-BUILD_DIR = SCRIPT_DIR / "build"
-FIRMWARE_BIN = BUILD_DIR / "zobo_esp32.bin"
-VERSION_JSON = BUILD_DIR / "version.json"
+from _tooling import (
+    CRC_CHUNK_SIZE,
+    FIRMWARE_BIN,
+    SCRIPT_DIR,
+    VERSION_JSON,
+    chunk_crc32,
+    find_esp_idf,
+    get_firmware_version,
+    get_idf_env,
+    idf_command,
+)
 
-
-def get_firmware_version():
-    """Extract firmware version from ota_manager.h."""
-    try:
-        content = OTA_MANAGER_H.read_text()
-        match = re.search(r'#define\s+FIRMWARE_VERSION\s+"([^"]+)"', content)
-        if match:
-            return match.group(1)
-    except Exception as e:
-        print(f"Error reading version: {e}")
-    return None
-
-
-def find_esp_idf():
-    """Find ESP-IDF installation."""
-    # Check environment variable
-    idf_path = os.environ.get("IDF_PATH")
-    if idf_path and Path(idf_path).exists():
-        return Path(idf_path)
-
-    # Check VS Code ESP-IDF extension settings
-    vscode_settings = Path.home() / "AppData/Roaming/Code/User/settings.json"
-    if vscode_settings.exists():
-        try:
-            settings = json.loads(vscode_settings.read_text())
-            if "idf.espIdfPathWin" in settings:
-                idf_path = Path(settings["idf.espIdfPathWin"])
-                if idf_path.exists():
-                    return idf_path
-        except Exception:
-            pass
-
-    # Common paths
-    common_paths = [
-        Path.home() / "esp" / "esp-idf",
-        Path("C:/Espressif/frameworks/esp-idf-v5.2"),
-        Path("C:/esp/esp-idf"),
-    ]
-    for path in common_paths:
-        if path.exists():
-            return path
-
-    return None
+# Lines of build output repeated when the build fails
+BUILD_LOG_TAIL = 200
 
 
 def run_command(cmd, cwd=None, shell=False):
@@ -110,44 +72,46 @@ def build_firmware():
 
     print(f"  Using ESP-IDF: {idf_path}")
 
-    # Create batch file to run build
-    export_bat = idf_path / "export.bat"
-    if not export_bat.exists():
-        print(f"  ERROR: {export_bat} not found!")
+    env = get_idf_env(idf_path)
+    if env is None:
+        print(f"  ERROR: Cannot load ESP-IDF environment from {idf_path}")
         return False
 
-    # Build command
-    build_cmd = f'call "{export_bat}" && idf.py build'
-    result = subprocess.run(
-        build_cmd,
+    # Build command - stream output live, keep only the tail for errors
+    process = subprocess.Popen(
+        idf_command(idf_path, env, "build"),
         cwd=SCRIPT_DIR,
-        shell=True,
-        capture_output=True,
-        text=True
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1
     )
 
-    if result.returncode != 0:
-        print(f"  Build failed: {result.stderr[-500:]}")
-        return False
+    tail = deque(maxlen=BUILD_LOG_TAIL)
+    for line in process.stdout:
+        sys.stdout.write(line)
+        tail.append(line)
 
-    if not FIRMWARE_BIN.exists():
-        print(f"  ERROR: Firmware binary not found at {FIRMWARE_BIN}")
+    if process.wait() != 0:
+        print("  Build failed! Last output:")
+        print("".join(tail))
         return False
 
-    print(f"  Firmware built: {FIRMWARE_BIN}")
-    print(f"  Size: {FIRMWARE_BIN.stat().st_size / 1024:.1f} KB")
     return True
 
 
-def create_version_json(version):
-    """Create version.json file."""
+def create_version_json(version, firmware):
+    """Create version.json file from firmware stat result."""
     print("\n[2/4] Creating version.json...")
 
     version_data = {
         "version": version,
-        "size": FIRMWARE_BIN.stat().st_size,
+        "size": firmware.st_size,
         "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "url": f"https://github.com/DavidPetrov2023/Zobo/releases/download/v{version}/zobo_esp32.bin"
+        "url": f"https://github.com/DavidPetrov2023/Zobo/releases/download/v{version}/zobo_esp32.bin",
+        "chunk_size": CRC_CHUNK_SIZE,
+        "crc32": chunk_crc32(FIRMWARE_BIN)
     }
 
     VERSION_JSON.write_text(json.dumps(version_data, indent=2))
@@ -256,12 +220,19 @@ def main():
             return 1
     else:
         print("\n[1/4] Skipping build...")
-        if not FIRMWARE_BIN.exists():
-            print(f"  ERROR: Firmware binary not found at {FIRMWARE_BIN}")
-            return 1
+
+    # Stat once, reused for the size print and version.json
+    try:
+        firmware = FIRMWARE_BIN.stat()
+    except FileNotFoundError:
+        print(f"  ERROR: Firmware binary not found at {FIRMWARE_BIN}")
+        return 1
+
+    print(f"  Firmware: {FIRMWARE_BIN}")
+    print(f"  Size: {firmware.st_size / 1024:.1f} KB")
 
     # Create version.json
-    if not create_version_json(version):
+    if not create_version_json(version, firmware):
         return 1
 
     # Check GitHub CLI
@@ -7,94 +7,408 @@ Usage:
   python build_install.py           # Build and install
   python build_install.py --no-install  # Build only
   python build_install.py --clean   # Clean build first
+  python build_install.py --debug   # Fast debug build with in-app log
+  python build_install.py -j 4      # Limit Gradle to 4 workers
 """
 
 import os
 import sys
+import json
+import shutil
 import subprocess
 import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
 # Configuration
 SCRIPT_DIR = Path(__file__).parent.resolve()
 PUBSPEC_YAML = SCRIPT_DIR / "pubspec.yaml"
 PUBSPEC_LOCK = SCRIPT_DIR / "pubspec.lock"
 DEPS_HASH_FILE = SCRIPT_DIR / ".deps_hash"
-APK_PATH = SCRIPT_DIR / "build/app/outputs/flutter-apk/app-release.apk"
+FLUTTER_OK_CACHE = SCRIPT_DIR / ".flutter_ok"
+BUILD_HASH_FILE = SCRIPT_DIR / ".build_hash"
+INSTALL_HASH_FILE = SCRIPT_DIR / ".install_hash"
+TRACE_FILE = SCRIPT_DIR / "build_trace.json"
+APK_DIR = SCRIPT_DIR / "build/app/outputs/flutter-apk"
+PACKAGE_CONFIG = SCRIPT_DIR / ".dart_tool" / "package_config.json"
+DART_TOOL_VERSION = SCRIPT_DIR / ".dart_tool" / "version"
+PACKAGE_GRAPH = SCRIPT_DIR / ".dart_tool" / "package_graph.json"
+APP_ID = "cz.davidpetrov.zobo_flutter"
+APP_STATE_CMD = f"dumpsys package {APP_ID} | grep -m1 lastUpdateTime"
+
+# Everything whose change requires a new APK
+BUILD_INPUTS = [
+    SCRIPT_DIR / "lib",
+    SCRIPT_DIR / "android",
+    SCRIPT_DIR / "assets",
+    PUBSPEC_YAML,
+    PUBSPEC_LOCK,
+]
+
+# Written by flutter/Gradle on every build (git-ignored), not inputs
+GENERATED_FILES = {"local.properties", "gradlew", "gradlew.bat", "gradle-wrapper.jar"}
+
+# Device ABI -> flutter --target-platform
+ABI_PLATFORMS = {
+    "arm64-v8a": "android-arm64",
+    "armeabi-v7a": "android-arm",
+    "x86_64": "android-x64",
+}
+
+# Parallel file reads when hashing sources
+HASH_WORKERS = 4
+HASH_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+_hash_buffers = threading.local()
+
+# Resolved pubspec.lock + package_config.json per pubspec.yaml, shared
+# by all checkouts using the same pub cache
+if os.name == "nt":
+    _DEFAULT_PUB_CACHE = Path(os.environ.get("LOCALAPPDATA", Path.home())) / "Pub" / "Cache"
+else:
+    _DEFAULT_PUB_CACHE = Path.home() / ".pub-cache"
+PUB_CACHE = Path(os.environ.get("PUB_CACHE") or _DEFAULT_PUB_CACHE)
+RESOLUTIONS_DIR = PUB_CACHE / ".zobo_resolutions"
+
+# What pub get produces; package_graph.json only exists with newer pub
+RESOLUTION_FILES = [PUBSPEC_LOCK, PACKAGE_CONFIG, DART_TOOL_VERSION, PACKAGE_GRAPH]
+
+# Pipeline phase timings, written to TRACE_FILE at exit
+TRACE_EVENTS = []
+
+# Full paths - flutter is a .bat on Windows and can't be started
+# without the shell by its bare name
+FLUTTER = shutil.which("flutter") or "flutter"
+ADB = shutil.which("adb") or "adb"
+
+
+@contextmanager
+def span(name):
+    """Record duration of the enclosed block as a Chrome trace event."""
+    start = time.perf_counter_ns() // 1000
+    try:
+        yield
+    finally:
+        TRACE_EVENTS.append({
+            "name": name,
+            "ph": "X",
+            "ts": start,
+            "dur": time.perf_counter_ns() // 1000 - start,
+            "pid": 0,
+            "tid": threading.get_ident(),
+        })
+
+
+def traced(name, func, *args):
+    """Call func inside a trace span (for use with executors)."""
+    with span(name):
+        return func(*args)
+
+
+def write_trace():
+    """Save recorded spans - open in chrome://tracing or Perfetto."""
+    if TRACE_EVENTS:
+        TRACE_FILE.write_text(json.dumps({"traceEvents": TRACE_EVENTS}))
 
 
 def get_pubspec_hash():
-    """Calculate hash of pubspec.yaml to detect changes."""
-    if PUBSPEC_YAML.exists():
-        content = PUBSPEC_YAML.read_bytes()
-        return hashlib.md5(content).hexdigest()
-    return None
+    """Calculate hash of pubspec.yaml + pubspec.lock to detect changes."""
+    if not PUBSPEC_YAML.exists():
+        return None
+
+    h = new_hash()
+    h.update(hash_file(PUBSPEC_YAML))
+    if PUBSPEC_LOCK.exists():
+        h.update(hash_file(PUBSPEC_LOCK))
+    return h.hexdigest()
+
+
+def iter_source_files():
+    """Yield all files that affect the APK build."""
+    stack = []
+    for p in BUILD_INPUTS:
+        if p.is_dir():
+            stack.append(p)
+        elif p.is_file():
+            yield str(p)
+
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                # Skip caches like android/.gradle
+                if entry.name.startswith(".") or entry.name in GENERATED_FILES:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path
+
+
+def new_hash():
+    """Hash object for change detection (no need for MD5/SHA strength)."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def update_hash(h, path):
+    """Feed file contents into hash h in fixed-size chunks."""
+    # One reusable buffer per thread instead of a bytes object per file
+    buf = getattr(_hash_buffers, "buf", None)
+    if buf is None:
+        buf = _hash_buffers.buf = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while n := f.readinto(buf):
+            h.update(view[:n])
+
+
+def hash_file(path):
+    """Content digest of a single file."""
+    h = new_hash()
+    update_hash(h, path)
+    return h.digest()
+
+
+def get_build_hash(build_cmd):
+    """Hash of source file contents and build command (argv list)."""
+    files = sorted(iter_source_files())
+
+    # Overlapping reads hides IO latency; more workers only add contention
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+        digests = pool.map(hash_file, files)
+
+    # Executable path left out so moving the SDK doesn't force a rebuild,
+    # but a different SDK revision (flutter upgrade) does
+    h = new_hash()
+    h.update(" ".join(build_cmd[1:]).encode())
+    h.update((flutter_sdk_revision() or "").encode())
+    for path, digest in zip(files, digests):
+        h.update(os.path.relpath(path, SCRIPT_DIR).encode())
+        h.update(digest)
+    return h.hexdigest()
+
+
+def get_pubspec_stat():
+    """(mtime_ns, size) of pubspec.yaml and pubspec.lock."""
+    stats = []
+    for path in (PUBSPEC_YAML, PUBSPEC_LOCK):
+        try:
+            st = path.stat()
+            stats.append([st.st_mtime_ns, st.st_size])
+        except FileNotFoundError:
+            stats.append(None)
+    return stats
+
+
+def load_deps_state():
+    """Saved {"stat": ..., "hash": ...} from last pub get, or None."""
+    try:
+        text = DEPS_HASH_FILE.read_text().strip()
+    except OSError:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        # Older versions stored just the hash
+        return {"stat": None, "hash": text}
+
+
+def resolution_dir():
+    """Cache directory for the current pubspec.yaml, None without one."""
+    if not PUBSPEC_YAML.exists():
+        return None
+    # Keyed on pubspec.yaml (the lock file is what gets cached) and the
+    # SDK, which pins the versions of its own framework packages
+    h = new_hash()
+    h.update(hash_file(PUBSPEC_YAML))
+    h.update((flutter_sdk_revision() or "").encode())
+    return RESOLUTIONS_DIR / h.hexdigest()
+
+
+def packages_present(package_config):
+    """Check that all packages listed in package_config.json are on disk."""
+    try:
+        packages = json.loads(package_config.read_text())["packages"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+    for package in packages:
+        uri = urlparse(package.get("rootUri", ""))
+        # Relative URIs point into this project
+        if uri.scheme == "file" and not Path(url2pathname(uri.path)).exists():
+            return False
+    return True
+
+
+def save_resolution():
+    """Store the pub get result (RESOLUTION_FILES) in the shared cache."""
+    cache_dir = resolution_dir()
+    if cache_dir is None or not PUBSPEC_LOCK.exists() or not PACKAGE_CONFIG.exists():
+        return
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for path in RESOLUTION_FILES:
+            if path.exists():
+                shutil.copy(path, cache_dir / path.name)
+    except OSError:
+        pass
+
+
+def restore_resolution():
+    """Restore a cached resolution of pubspec.yaml, True on success."""
+    cache_dir = resolution_dir()
+    if cache_dir is None:
+        return False
+
+    # Packages may have been removed by pub cache clean
+    if (not (cache_dir / PUBSPEC_LOCK.name).exists()
+            or not packages_present(cache_dir / PACKAGE_CONFIG.name)):
+        return False
+
+    # flutter build skips its own pub get only when pubspec.lock is newer
+    # than pubspec.yaml and .dart_tool files are newer than the lock, so
+    # give restored files fresh timestamps in that order
+    mtime_ns = max(time.time_ns(), PUBSPEC_YAML.stat().st_mtime_ns + 1_000_000)
+    try:
+        PACKAGE_CONFIG.parent.mkdir(exist_ok=True)
+        for path in RESOLUTION_FILES:
+            cached = cache_dir / path.name
+            if not cached.exists():
+                continue
+            shutil.copy(cached, path)
+            stamp = mtime_ns if path == PUBSPEC_LOCK else mtime_ns + 1_000_000
+            os.utime(path, ns=(stamp, stamp))
+    except OSError:
+        return False
+    return True
 
 
 def needs_pub_get():
     """Check if flutter pub get is needed."""
-    # No lock file = definitely need pub get
+    # No lock file = need pub get, unless this pubspec.yaml was already
+    # resolved elsewhere
     if not PUBSPEC_LOCK.exists():
+        if restore_resolution():
+            save_pubspec_hash()
+            return False, "obnoveno z cache"
         return True, "pubspec.lock neexistuje"
 
-    # Check if pubspec.yaml changed since last pub get
-    current_hash = get_pubspec_hash()
-    if DEPS_HASH_FILE.exists():
-        saved_hash = DEPS_HASH_FILE.read_text().strip()
-        if current_hash != saved_hash:
-            return True, "pubspec.yaml se změnil"
-    else:
+    # Removed by flutter clean
+    if not PACKAGE_CONFIG.exists():
+        return True, ".dart_tool neexistuje"
+
+    saved = load_deps_state()
+    if saved is None:
         # First run with this script
         return True, "první spuštění"
 
+    # Unchanged timestamps and sizes - no need to read the files
+    current_stat = get_pubspec_stat()
+    if current_stat == saved.get("stat"):
+        return False, None
+
+    # Touched (e.g. git checkout) - compare contents
+    current_hash = get_pubspec_hash()
+    if current_hash != saved.get("hash"):
+        return True, "pubspec.yaml nebo pubspec.lock se změnil"
+
+    DEPS_HASH_FILE.write_text(json.dumps({"stat": current_stat, "hash": current_hash}))
     return False, None
 
 
 def save_pubspec_hash():
-    """Save current pubspec.yaml hash."""
+    """Save current pubspec.yaml + pubspec.lock hash and timestamps."""
     current_hash = get_pubspec_hash()
     if current_hash:
-        DEPS_HASH_FILE.write_text(current_hash)
+        DEPS_HASH_FILE.write_text(json.dumps({
+            "stat": get_pubspec_stat(),
+            "hash": current_hash,
+        }))
+        save_resolution()
 
 
-def run_command(cmd, description):
-    """Run a command and show output."""
+def run_command(cmd, description, env=None):
+    """Run a command (argv list) and show output."""
     print(f"\n{'='*60}")
     print(f"  {description}")
     print('='*60 + "\n")
 
-    result = subprocess.run(
-        cmd,
-        cwd=str(SCRIPT_DIR),
-        shell=True
-    )
+    try:
+        result = subprocess.run(cmd, cwd=str(SCRIPT_DIR), env=env)
+    except OSError as e:
+        print(f"  {e}")
+        return False
     return result.returncode == 0
 
 
+@lru_cache(maxsize=None)
+def flutter_sdk_revision():
+    """Flutter SDK version and engine revision, None if unknown."""
+    exe = shutil.which("flutter")
+    if not exe:
+        return None
+
+    # flutter upgrade is a git update that leaves bin/flutter alone,
+    # but always changes these files
+    root = Path(exe).resolve().parent.parent
+    parts = []
+    for name in ("version", "bin/internal/engine.version"):
+        try:
+            parts.append((root / name).read_text().strip())
+        except OSError:
+            pass
+    return "+".join(parts) or None
+
+
 def check_flutter():
-    """Check if Flutter is available."""
-    result = subprocess.run(
-        "flutter --version",
-        cwd=str(SCRIPT_DIR),
-        shell=True,
-        capture_output=True
-    )
-    return result.returncode == 0
+    """Check if Flutter is available (cached until the SDK changes)."""
+    exe = shutil.which("flutter")
+    if not exe:
+        return False
+
+    # Starting the Dart VM takes seconds - skip it if this exact
+    # flutter SDK already passed the check
+    key = f"{exe}:{flutter_sdk_revision() or os.path.getmtime(exe)}"
+    if FLUTTER_OK_CACHE.exists() and FLUTTER_OK_CACHE.read_text() == key:
+        return True
+
+    try:
+        # Only the exit code matters - don't pipe the version banner
+        result = subprocess.run(
+            [exe, "--version"],
+            cwd=str(SCRIPT_DIR),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+    except OSError:
+        return False
+
+    if result.returncode != 0:
+        return False
+    FLUTTER_OK_CACHE.write_text(key)
+    return True
 
 
 def check_adb():
     """Check if ADB is available and device connected."""
-    result = subprocess.run(
-        "adb devices",
-        shell=True,
-        capture_output=True,
-        text=True
-    )
+    try:
+        result = subprocess.run(
+            [ADB, "devices"],
+            capture_output=True,
+            text=True
+        )
+    except OSError:
+        return False, "ADB není dostupný"
     if result.returncode != 0:
         return False, "ADB není dostupný"
 
     lines = result.stdout.strip().split('\n')
-    devices = [l for l in lines[1:] if l.strip() and 'device' in l]
+    devices = [l for l in lines[1:] if l.split()[1:2] == ['device']]
 
     if not devices:
         return False, "Žádné zařízení není připojeno"
@@ -102,10 +416,127 @@ def check_adb():
     return True, devices[0].split()[0]
 
 
+def adb(device, *args):
+    """argv for an adb command addressed to one device."""
+    return [ADB, "-s", device, *args]
+
+
+def load_installed():
+    """Map of device id -> {"hash", "updated"} of the build installed there."""
+    try:
+        return json.loads(INSTALL_HASH_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_installed(device, build_hash, update_time):
+    """Remember which build was installed on device and when."""
+    installed = load_installed()
+    installed[device] = {"hash": build_hash, "updated": update_time}
+    INSTALL_HASH_FILE.write_text(json.dumps(installed))
+
+
+def is_installed(device, build_hash, update_time):
+    """Check whether device already runs this exact build."""
+    saved = load_installed().get(device)
+    # Older versions stored just the hash
+    if not isinstance(saved, dict) or update_time is None:
+        return False
+    # lastUpdateTime changes with any install, so flutter run, Android
+    # Studio or another checkout installing the app in between is noticed
+    return saved.get("hash") == build_hash and saved.get("updated") == update_time
+
+
+def parse_update_time(lines):
+    """lastUpdateTime from dumpsys package output, None if not installed."""
+    for line in lines:
+        line = line.strip()
+        if line.startswith("lastUpdateTime="):
+            return line.split("=", 1)[1]
+    return None
+
+
+def get_update_time(device):
+    """When the app was last installed/updated on device, None if unknown."""
+    try:
+        result = subprocess.run(
+            adb(device, "shell", APP_STATE_CMD),
+            capture_output=True,
+            text=True
+        )
+    except OSError:
+        return None
+    return parse_update_time(result.stdout.splitlines())
+
+
+def probe_device(device):
+    """Primary ABI (None if unknown) and app's lastUpdateTime (None if absent).
+
+    Both queries go through one adb shell session - every adb call is
+    a new client process and a USB roundtrip to adbd.
+    """
+    try:
+        result = subprocess.run(
+            adb(device, "shell", f"getprop ro.product.cpu.abi; {APP_STATE_CMD}"),
+            capture_output=True,
+            text=True
+        )
+    except OSError:
+        return None, None
+
+    lines = result.stdout.splitlines()
+    abi = lines[0].strip() if lines else ""
+    return abi or None, parse_update_time(lines[1:])
+
+
+def install_apk(device, apk_path):
+    """Install APK, uploading only changed parts when adb supports it."""
+    if run_command(adb(device, "install", "-r", "--fastdeploy", str(apk_path)),
+                   "Instalace do telefonu (fast deploy)..."):
+        return True
+
+    # Older adb / Android < 7 - fall back to full upload
+    print("\n  Fast deploy nelze použít, zkouším běžnou instalaci")
+    return run_command(adb(device, "install", "-r", str(apk_path)), "Instalace do telefonu...")
+
+
 def clean_build():
     """Clean Flutter build."""
     print("Cleaning build...")
-    subprocess.run("flutter clean", cwd=str(SCRIPT_DIR), shell=True)
+    try:
+        subprocess.run(
+            [FLUTTER, "clean"],
+            cwd=str(SCRIPT_DIR),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+    except OSError:
+        pass
+
+
+def get_jobs(args):
+    """Value of -j/--jobs N (or --jobs=N), default = CPU count."""
+    for i, arg in enumerate(args):
+        if arg.startswith("--jobs="):
+            value = arg.split("=", 1)[1]
+        elif arg in ("--jobs", "-j") and i + 1 < len(args):
+            value = args[i + 1]
+        else:
+            continue
+        if not value.isdigit() or int(value) < 1:
+            print(f"\nERROR: Neplatný počet jobů: {value}")
+            sys.exit(1)
+        return int(value)
+    return os.cpu_count() or 1
+
+
+def gradle_env(jobs):
+    """Environment for flutter build with Gradle parallelism set."""
+    env = os.environ.copy()
+    opts = f"-Dorg.gradle.workers.max={jobs} -Dorg.gradle.parallel=true -Dorg.gradle.caching=true"
+    # Keep the user's own options (e.g. -Xmx)
+    env["GRADLE_OPTS"] = f"{env['GRADLE_OPTS']} {opts}" if env.get("GRADLE_OPTS") else opts
+    return env
 
 
 def print_usage():
@@ -117,12 +548,18 @@ Options:
   --no-install, -n  Build only, skip installation
   --clean, -c       Clean build directory first
   --force-deps, -f  Force flutter pub get
-  --debug, -d       Enable debug mode (show log in app)
+  --debug, -d       Debug build (JIT, much faster build, show log in app)
+  --profile, -p     Profile build (AOT like release, with profiling)
+  --jobs N, -j N    Max parallel Gradle workers (default: CPU count)
   --help, -h        Show this help
 
+Release builds compile Dart ahead-of-time, which dominates build time.
+Debug builds skip that but the app runs slower on the phone.
+
 Examples:
-  python build_install.py              # Build + install (bez logu)
-  python build_install.py -d           # Build + install s logem
+  python build_install.py              # Release build + install (bez logu)
+  python build_install.py -d           # Debug build + install s logem
+  python build_install.py -p           # Profile build + install
   python build_install.py -n           # Build only
   python build_install.py -c           # Clean + build + install
 """)
@@ -144,78 +581,128 @@ def main():
     no_install = "--no-install" in args or "-n" in args
     force_deps = "--force-deps" in args or "-f" in args
     debug_mode = "--debug" in args or "-d" in args
-
-    # Check Flutter
-    if not check_flutter():
+    profile_mode = "--profile" in args or "-p" in args
+    jobs = get_jobs(args)
+
+    # Check Flutter and ADB (if we need to install) in parallel, cleaning
+    # meanwhile if requested. pub get can't join in - flutter clean
+    # deletes .dart_tool, which is where pub get writes.
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        if do_clean:
+            pool.submit(traced, "clean", clean_build)
+        flutter_future = pool.submit(traced, "check_flutter", check_flutter)
+        adb_future = pool.submit(traced, "check_adb", check_adb) if not no_install else None
+        flutter_ok = flutter_future.result()
+        adb_ok, adb_info = adb_future.result() if adb_future else (True, None)
+
+    if not flutter_ok:
         print("\nERROR: Flutter není dostupný!")
         print("Nainstaluj Flutter SDK a přidej do PATH")
         sys.exit(1)
 
-    # Check ADB if we need to install
+    device = None
     if not no_install:
-        adb_ok, adb_info = check_adb()
         if not adb_ok:
             print(f"\nERROR: {adb_info}")
             print("Připoj telefon přes USB a povol USB debugging")
             sys.exit(1)
         print(f"\n  Zařízení: {adb_info}")
 
-    # Clean if requested
-    if do_clean:
-        clean_build()
+        # Pin every later adb call (ours and child processes') to this device
+        device = adb_info
+        os.environ["ANDROID_SERIAL"] = device
 
     # Check dependencies
-    need_deps, reason = needs_pub_get()
+    with span("needs_pub_get"):
+        need_deps, reason = needs_pub_get()
     if force_deps:
         need_deps = True
         reason = "vynuceno parametrem -f"
 
     if need_deps:
         print(f"\n  Závislosti: nutná aktualizace ({reason})")
-        if not run_command("flutter pub get", "Stahování závislostí..."):
+        with span("pub_get"):
+            ok = run_command([FLUTTER, "pub", "get"], "Stahování závislostí...")
+        if not ok:
             print("\nERROR: flutter pub get selhalo!")
             sys.exit(1)
         save_pubspec_hash()
     else:
-        print("\n  Závislosti: OK (bez změn)")
+        print(f"\n  Závislosti: OK ({reason or 'bez změn'})")
 
     # Build APK
-    build_cmd = "flutter build apk --release"
     if debug_mode:
-        build_cmd += " --dart-define=DEBUG_MODE=true"
-        print("\n  Mode: DEBUG (s logem)")
+        mode = "debug"
+        print("\n  Mode: DEBUG (JIT, s logem)")
+    elif profile_mode:
+        mode = "profile"
+        print("\n  Mode: PROFILE (bez logu)")
     else:
+        mode = "release"
         print("\n  Mode: RELEASE (bez logu)")
 
-    if not run_command(build_cmd, "Building APK..."):
-        print("\nERROR: Build selhal!")
-        sys.exit(1)
+    build_cmd = [FLUTTER, "build", "apk", f"--{mode}"]
+    if debug_mode:
+        build_cmd.append("--dart-define=DEBUG_MODE=true")
+
+    # Build only for the phone's ABI - skips AOT compile for the others.
+    # The probe also wakes up adbd on the phone before install.
+    abi, update_time = None, None
+    if device:
+        with span("probe_device"):
+            abi, update_time = probe_device(device)
+    if abi in ABI_PLATFORMS:
+        build_cmd += ["--target-platform", ABI_PLATFORMS[abi], "--split-per-abi"]
+        apk_path = APK_DIR / f"app-{abi}-{mode}.apk"
+        print(f"  ABI:  {abi}")
+    else:
+        apk_path = APK_DIR / f"app-{mode}.apk"
+
+    # Skip the build when sources and build options are unchanged
+    with span("build_hash"):
+        build_hash = get_build_hash(build_cmd)
+    if (apk_path.exists() and BUILD_HASH_FILE.exists()
+            and BUILD_HASH_FILE.read_text().strip() == build_hash):
+        print("\n  Build: APK je aktuální (bez změn ve zdrojích)")
+    else:
+        with span("build"):
+            ok = run_command(build_cmd, f"Building APK ({jobs} jobs)...", gradle_env(jobs))
+        if not ok:
+            print("\nERROR: Build selhal!")
+            sys.exit(1)
+        BUILD_HASH_FILE.write_text(build_hash)
 
-    # Check APK exists
-    if not APK_PATH.exists():
-        print(f"\nERROR: APK nebylo vytvořeno: {APK_PATH}")
+    # Check APK exists - one stat serves the size print and summary too
+    try:
+        apk_size = apk_path.stat().st_size / (1024 * 1024)
+    except FileNotFoundError:
+        print(f"\nERROR: APK nebylo vytvořeno: {apk_path}")
         sys.exit(1)
-
-    apk_size = APK_PATH.stat().st_size / (1024 * 1024)
     print(f"\n  APK: {apk_size:.1f} MB")
 
     # Install to phone
     if not no_install:
-        if not run_command(f"adb install -r \"{APK_PATH}\"", "Instalace do telefonu..."):
-            print("\nERROR: Instalace selhala!")
-            sys.exit(1)
+        with span("install"):
+            if is_installed(device, build_hash, update_time):
+                print("\n  Instalace: tento build už je v telefonu, přeskakuji")
+            else:
+                if not install_apk(device, apk_path):
+                    print("\nERROR: Instalace selhala!")
+                    sys.exit(1)
+                save_installed(device, build_hash, get_update_time(device))
 
         # Launch the app
-        run_command(
-            "adb shell am start -n cz.davidpetrov.zobo_flutter/.MainActivity",
-            "Spouštění aplikace..."
-        )
+        with span("launch"):
+            run_command(
+                adb(device, "shell", "am", "start", "-n", f"{APP_ID}/.MainActivity"),
+                "Spouštění aplikace..."
+            )
 
     # Summary
     print("\n" + "="*60)
     print("  Hotovo!")
     print("="*60)
-    print(f"  APK:  {APK_PATH}")
+    print(f"  APK:  {apk_path}")
     print(f"  Size: {apk_size:.1f} MB")
     if not no_install:
         print("  Status: Nainstalováno v telefonu")
@@ -223,4 +710,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        write_trace()